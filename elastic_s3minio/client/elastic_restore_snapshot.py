@@ -72,18 +72,23 @@ def read_config_server(file_path, locations):
         servers = config.get('servers', [])
         default_config = config.get('default', {})
         
+        # Lowercase each server name once (first entry wins), instead of per location per server.
+        servers_by_name = {}
+        for server in servers:
+            servers_by_name.setdefault(server['name'].lower(), server)
+
         for location in locations:
-            for server in servers:
-                if server['name'].lower() == location.lower():
-                    return {
-                        'elastic_host': server.get('hostname', default_config.get('hostname', 'localhost')),
-                        'elastic_port': server.get('port', default_config.get('port', 9200)),
-                        'use_ssl': server.get('use_ssl', default_config.get('use_ssl', False)),
-                        'elastic_authentication': server.get('elastic_authentication', default_settings.get('elastic_authentication', False)),
-                        'elastic_username': server.get('elastic_username', default_settings.get('elastic_username', None)),
-                        'elastic_password': server.get('elastic_password', default_settings.get('elastic_password', None)),
-                        'repository': server.get('repository', default_config.get('repository', 'default-repo'))
-                    }
+            server = servers_by_name.get(location.lower())
+            if server is not None:
+                return {
+                    'elastic_host': server.get('hostname', default_config.get('hostname', 'localhost')),
+                    'elastic_port': server.get('port', default_config.get('port', 9200)),
+                    'use_ssl': server.get('use_ssl', default_config.get('use_ssl', False)),
+                    'elastic_authentication': server.get('elastic_authentication', default_settings.get('elastic_authentication', False)),
+                    'elastic_username': server.get('elastic_username', default_settings.get('elastic_username', None)),
+                    'elastic_password': server.get('elastic_password', default_settings.get('elastic_password', None)),
+                    'repository': server.get('repository', default_config.get('repository', 'default-repo'))
+                }
         
         return None
 
@@ -1170,9 +1175,8 @@ Function to update the status bar with latest data.
 def status_bar_update(message):
     global console
 
-    with console.status(f"[bold green]{message}") as status:
-        time.sleep(0.5)
-        console.log(message)
+    # Just log it, no need to hold a spinner on screen for an artificial delay.
+    console.log(message)
 
 
 def count_documents_with_status_init():
@@ -11,20 +11,33 @@ DATE = "04/22/2024"
 import argparse
 import json
 import os
+import sys
 import yaml
 import requests
 import warnings
 import urllib3
-from elasticsearch import Elasticsearch, ElasticsearchWarning, exceptions, helpers
-from elasticsearch.exceptions import RequestError
+from concurrent.futures import ThreadPoolExecutor
+from operator import itemgetter
+from elasticsearch import Elasticsearch, ElasticsearchWarning, exceptions
 from rich import print
-from rich.console import Console
+from rich.console import Console, Group
 from rich.table import Table
 from rich.panel import Panel
-from rich.syntax import Syntax
 from rich.text import Text
 from rich import box
 
+# Use the libyaml based loader when PyYAML was built with it
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
+# orjson is optional, it's much faster at dumping large responses (indices, shards) when installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 # Suppress only the InsecureRequestWarning from urllib3 needed for Elasticsearch
 urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
 requests.packages.urllib3.disable_warnings(DeprecationWarning)
@@ -33,6 +46,88 @@ requests.packages.urllib3.disable_warnings(DeprecationWarning)
 warnings.filterwarnings("ignore", category=UserWarning, module="elasticsearch")
 warnings.filterwarnings("ignore", category=ElasticsearchWarning)
 
+# Single letter abbreviations for node roles (same as _cat/nodes node.role)
+ROLE_MAPPING = {
+    'data_cold': 'c',
+    'data': 'd',
+    'data_frozen': 'f',
+    'data_hot': 'h',
+    'ingest': 'i',
+    'ml': 'l',
+    'master': 'm',
+    'remote_cluster_client': 'r',
+    'data_content': 's',
+    'transform': 't',
+    'data_warm': 'w'
+}
+
+# Map box_style strings from elastic_servers.yml to rich box styles
+BOX_STYLES = {
+    "SIMPLE": box.SIMPLE,
+    "ASCII": box.ASCII,
+    "SQUARE": box.SQUARE,
+    "ROUNDED": box.ROUNDED,
+    "SQUARE_DOUBLE_HEAD": box.SQUARE_DOUBLE_HEAD
+}
+
+# allocation_cmd -> (change_shard_allocation option, success message)
+ALLOCATION_CHANGES = {
+    "disable": ("primary", "Successfully changed allocation to primaries only."),
+    "enable": ("all", "Successfully re-enabled all shards allocation.")
+}
+
+# Roles that mean a node holds data (ES 7.10+ nodes may only have the tiered roles)
+DATA_ROLES = frozenset({'data', 'data_content', 'data_hot', 'data_warm', 'data_cold', 'data_frozen'})
+
+# Colored markup for cluster health status values
+STATUS_MARKUP = {
+    'green': '[green]green[/green]',
+    'yellow': '[yellow]yellow[/yellow]',
+    'red': '[red]red[/red]'
+}
+
+# Fields needed from _cluster/health
+HEALTH_FILTER = ','.join([
+    'cluster_name',
+    'status',
+    'number_of_nodes',
+    'number_of_data_nodes',
+    'active_primary_shards',
+    'active_shards',
+    'unassigned_shards',
+    'delayed_unassigned_shards',
+    'number_of_pending_tasks',
+    'number_of_in_flight_fetch',
+    'active_shards_percent_as_number'
+])
+
+# Columns shown in the nodes / masters tables
+NODE_DISPLAY_KEYS = ("name", "hostname", "node", "roles")
+
+# (header, justify) for the indices table
+INDICES_COLUMNS = (
+    ("Health", "right"),
+    ("Satus", "right"),
+    ("Indice", "left"),
+    ("UUID", "left"),
+    ("Docs", "right"),
+    ("Pri/Rep", "center"),
+    ("Size Primary", "right"),
+    ("Size Total", "right")
+)
+
+# Shared read-only default for nested .get() lookups
+EMPTY_DICT = {}
+
+# Fields needed from _nodes/stats to build the nodes list
+NODE_STATS_FILTER = ','.join([
+    'nodes.*.name',
+    'nodes.*.host',
+    'nodes.*.roles',
+    'nodes.*.indices.docs.count',
+    'nodes.*.indices.shard_stats.total_count'
+])
+
 
 class ElasticsearchClient:
     def __init__(self, host='localhost', port=9200, use_ssl=False, verify_certs=False, elastic_authentication=False, elastic_username=None, elastic_password=None, box_style=box.SIMPLE):
@@ -51,10 +146,10 @@ class ElasticsearchClient:
         if (self.elastic_username != None and self.elastic_password != None):
             self.elastic_authentication = True
 
+        es_host = {'host': self.host, 'port': self.port, 'use_ssl': self.use_ssl, 'verify_certs': self.verify_certs}
         if self.elastic_authentication == True:
-            self.es = Elasticsearch([{'host': self.host, 'port': self.port, 'use_ssl': self.use_ssl, 'verify_certs': self.verify_certs, 'http_auth': (self.elastic_username, self.elastic_password)}])
-        else:
-            self.es = Elasticsearch([{'host': self.host, 'port': self.port, 'use_ssl': self.use_ssl, 'verify_certs': self.verify_certs}])
+            es_host['http_auth'] = (self.elastic_username, self.elastic_password)
+        self.es = Elasticsearch([es_host])
 
         if self.es.ping():
             pass
@@ -91,38 +186,27 @@ class ElasticsearchClient:
 
         console.print(table)
 
-    def flush_synced_elasticsearch(self, host, port, use_ssl=False, authentication=False, username=None, password=None):
+    def flush_synced_elasticsearch(self):
         """
         Issue a POST request to Elasticsearch's _flush/synced endpoint.
 
-        Args:
-        - host (str): The hostname or IP address of the Elasticsearch instance.
-        - port (int): The port number of the Elasticsearch instance.
-        - use_ssl (bool): Whether to use SSL/TLS for the connection.
-        - authentication (bool): Whether to use HTTP authentication.
-        - username (str): The username for HTTP authentication.
-        - password (str): The password for HTTP authentication.
+        Uses the existing Elasticsearch client, so the request reuses its
+        connection pool, SSL and authentication settings.
+
+        A 409 just means some shard copies failed to sync (common while still
+        indexing), the body still carries the _shards counts so return it as well.
 
         Returns:
         - dict: The JSON response from Elasticsearch.
         """
-        scheme = 'https' if use_ssl else 'http'
-        url = f"{scheme}://{host}:{port}/_flush/synced"
-
-        if authentication:
-            response = requests.post(url, auth=(username, password))
-        else:
-            response = requests.post(url)
-
-        return response.json()
+        return self.es.indices.flush_synced(ignore=409)
 
 
     def filter_nodes_by_role(self, nodes_list, role):
-        filtered_nodes = []
-        for node in nodes_list:
-            if role in node['roles']:
-                filtered_nodes.append(node)
-        return filtered_nodes
+        return [node for node in nodes_list if role in node['roles']]
+
+    def filter_data_nodes(self, nodes_list):
+        return [node for node in nodes_list if not DATA_ROLES.isdisjoint(node['roles'])]
 
     def format_bytes(self, size_in_bytes):
         # Function to convert bytes to a human-readable format
@@ -130,6 +214,8 @@ class ElasticsearchClient:
             if size_in_bytes < 1024.0:
                 return f"{size_in_bytes:.2f} {unit}"
             size_in_bytes /= 1024.0
+        # Anything of 1024 TB or more is shown in PB, so a string is always returned.
+        return f"{size_in_bytes:.2f} PB"
 
     def get_template(self, name=None):
         if name:
@@ -138,19 +224,27 @@ class ElasticsearchClient:
             return self.es.indices.get_template()
 
     def get_nodes(self):
-        stats = self.es.nodes.stats()
+        # Only request the indices metric, and only the fields parse_node_stats() reads.
+        stats = self.es.nodes.stats(metric='indices', filter_path=NODE_STATS_FILTER)
         node_stats = self.parse_node_stats(stats)
-        nodes_sorted = sorted(node_stats, key=lambda x: x['name'])
+        nodes_sorted = sorted(node_stats, key=itemgetter('name'))
         return nodes_sorted
 
+    def get_nodes_and_master(self):
+        # Independent requests, run them side by side instead of back to back.
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            nodes_future = executor.submit(self.get_nodes)
+            master_future = executor.submit(self.get_master_node)
+            return nodes_future.result(), master_future.result()
+
     def get_all_nodes_stats(self):
         nodes_stats = self.es.nodes.stats()
         return nodes_stats['nodes']
 
     def get_cluster_health(self):
 
-        # Retrieve cluster health
-        cluster_health = self.es.cluster.health()
+        # Retrieve cluster health (only the fields shown below)
+        cluster_health = self.es.cluster.health(filter_path=HEALTH_FILTER)
         cluster_data = { 
             'cluster_name': cluster_health['cluster_name'],
             'cluster_status': cluster_health['status'],
@@ -180,10 +274,12 @@ class ElasticsearchClient:
 
     def get_allocation_as_dict(self):
 
-        allocation = self.es.cat.allocation(format='json', bytes='b')
+        # Only ask for the columns used below
+        allocation = self.es.cat.allocation(format='json', bytes='b', h='node,shards,disk.percent,disk.used,disk.avail,disk.total')
         
+        # Sort the entries by node name first, so the dict is built in order (no second copy)
         allocation_dict = {}
-        for entry in allocation:
+        for entry in sorted(allocation, key=itemgetter('node')):
             node = entry['node']
             allocation_dict[node] = {
                 'shards': int(entry['shards']),
@@ -193,10 +289,7 @@ class ElasticsearchClient:
                 'disk.total': int(entry['disk.total']) if entry['disk.total'] is not None else 0
             }
 
-        # Sort the dictionary by keys alphabetically
-        sorted_allocation_dict = dict(sorted(allocation_dict.items()))
-        
-        return sorted_allocation_dict
+        return allocation_dict
 
     def get_indices_stats(self, pattern=None):
  
@@ -208,7 +301,7 @@ class ElasticsearchClient:
         else:
             search_pattern = f"*{self.pattern}*"
             indices = self.es.cat.indices(format='json', index=search_pattern)
-        return json.dumps(indices)
+        return indices
 
 
     def get_shards_stats(self, pattern=None):
@@ -230,11 +323,11 @@ class ElasticsearchClient:
         # Get all indices
         if (self.pattern == None):
             indices = self.es.cat.indices(format='json')
-            indices_sorted = sorted(indices, key=lambda x: x['index'])
+            indices_sorted = sorted(indices, key=itemgetter('index'))
         else:
             search_pattern = f"*{self.pattern}*"
             indices = self.es.cat.indices(format='json', index=search_pattern)
-            indices_sorted = sorted(indices, key=lambda x: x['index'])
+            indices_sorted = sorted(indices, key=itemgetter('index'))
 
         self.print_table_indices(indices_sorted)
 
@@ -245,19 +338,18 @@ class ElasticsearchClient:
         return master_node
 
     def obtain_keys_values(self, data):
-        keys = []
+        # dicts keep insertion order, so values doubles as the ordered key set (O(1) lookups)
         values = {}
 
         if data:  # Ensure that data is not empty
             for entry in data:
                 for key, value in entry.items():
-                    if key not in keys:
-                        keys.append(key)
+                    if key not in values:
                         values[key] = [value]
                     else:
                         values[key].append(value)
 
-        return keys, [values[key] for key in keys]
+        return list(values), list(values.values())
 
     def flatten_json(self, json_obj, parent_key='', sep='.'):
         # Convert a JSON string to a dictionary if needed
@@ -272,14 +364,19 @@ class ElasticsearchClient:
         if not json_obj:
             return {}
 
-        items = []
-        for k, v in json_obj.items():
-            new_key = f"{parent_key}{sep}{k}" if parent_key else k
-            if isinstance(v, dict):
-                items.extend(self.flatten_json(v, new_key, sep=sep).items())
-            else:
-                items.append((new_key, v))
-        return dict(items)
+        # Walk nested dicts writing straight into one result dict (no per-level copies)
+        flattened = {}
+
+        def flatten_into(obj, prefix):
+            for k, v in obj.items():
+                new_key = f"{prefix}{sep}{k}" if prefix else k
+                if isinstance(v, dict):
+                    flatten_into(v, new_key)
+                else:
+                    flattened[new_key] = v
+
+        flatten_into(json_obj, parent_key)
+        return flattened
 
     def get_recovery_status(self):
         """
@@ -294,16 +391,16 @@ class ElasticsearchClient:
                     if index not in recovery_status:
                         recovery_status[index] = []
                     recovery_status[index].append(entry)
-        except Exception as e:
-            print(f"An error occurred: {e}")
+        except (exceptions.TransportError, KeyError) as e:
+            print(f"An error occurred: {e}", file=sys.stderr)
         return recovery_status
 
     def get_shards_as_dict(self):
         shards_info_list = []
         try:
             response = self.es.cat.shards(format="json")
-            for shard_info in response:
-                shard_dict = {
+            shards_info_list = [
+                {
                     "index": shard_info["index"],
                     "shard": shard_info["shard"],
                     "prirep": shard_info["prirep"],
@@ -312,47 +409,49 @@ class ElasticsearchClient:
                     "store": shard_info["store"],
                     "node": shard_info["node"]
                 }
-                shards_info_list.append(shard_dict)
-        except Exception as e:
-            print(f"An error occurred: {e}")
+                for shard_info in response
+            ]
+        except (exceptions.TransportError, KeyError) as e:
+            print(f"An error occurred: {e}", file=sys.stderr)
 
-        # Sort shards_info_list by index_name
-        sorted_shards_info_list = sorted(shards_info_list, key=lambda x: x["index"])
+        # Sort shards_info_list by index_name (in place, no second list)
+        shards_info_list.sort(key=itemgetter('index'))
 
-        return sorted_shards_info_list
+        return shards_info_list
 
 
-    def print_filtered_key_value_pairs(self, keys, values, display_keys):
+    def print_filtered_key_value_pairs(self, keys, values, display_keys, current_master=None):
      
         table = Table(show_header=True, show_lines=False, box=self.box_style)
-        for key in display_keys:
-            if key in keys:
-                table.add_column(str(key), style="white")
 
-         # Transpose the values so each inner list represents a row
-        rows = list(zip(*values))
+        # Work out which columns to show (and where they live in each row) once, not per cell.
+        columns = [(key, keys.index(key)) for key in display_keys if key in keys]
+        for key, key_index in columns:
+            table.add_column(str(key), style="white")
+
+         # Transpose the values so each inner tuple represents a row (lazily, rows are only walked once)
+        rows = zip(*values)
+
+        # See what current master is (once per table) so we can display * next to it.
+        if current_master is None and 'name' in display_keys:
+            current_master = self.get_master_node()
+        _current_master = str(current_master)
 
         for row in rows:
             display_values = []
-            for key in display_keys:
-                if key in keys:
-                    key_index = keys.index(key)
-                    value = row[key_index]
-
-                    if key == 'name':
-                        
-                        # See if what current master is and display * next to it.
-                        _current_master = self.get_master_node()
-                        if str(value) == str(_current_master):
-                            value += " [bold cyan]*[/bold cyan]"
-
-                    if key == 'roles':
-                        value = self.replace_roles(value)
-                    display_values.append(str(value))
+            for key, key_index in columns:
+                value = row[key_index]
+
+                if key == 'name':
+                    if str(value) == _current_master:
+                        value += " [bold cyan]*[/bold cyan]"
+
+                if key == 'roles':
+                    value = self.replace_roles(value)
+                display_values.append(str(value))
             table.add_row(*display_values)
  
 
-        console = Console()
         console.print(table)
 
 
@@ -362,8 +461,10 @@ class ElasticsearchClient:
             hostname = node_info.get('host', 'Unknown')
             name = node_info.get('name', 'Unknown')
             roles = node_info.get('roles', [])
-            indices_count = node_info.get('indices', {}).get('docs', {}).get('count', 0)
-            shards_count = node_info.get('indices', {}).get('shard_stats', {}).get('total_count', 0)
+            # Look up the indices section once for both counters
+            indices_info = node_info.get('indices', EMPTY_DICT)
+            indices_count = indices_info.get('docs', EMPTY_DICT).get('count', 0)
+            shards_count = indices_info.get('shard_stats', EMPTY_DICT).get('total_count', 0)
             parsed_data.append({
                 'nodeid': node_id,
                 'name': name,
@@ -380,8 +481,6 @@ class ElasticsearchClient:
 
 
     def print_table_allocation(self, title, data_dict):
-        console = Console()
-
         table = Table(show_header=True, title=title, header_style="bold cyan", box=self.box_style)
         table.add_column("Storage Node")
         table.add_column("Shards", justify="center") 
@@ -390,20 +489,20 @@ class ElasticsearchClient:
         table.add_column("Disk Avail", justify="center")
         table.add_column("Disk Total", justify="center")
 
-        for key, value in data_dict.items():
-            storage_node = key
-            storage_values = value
-            storage_shards = storage_values['shards']
-            storage_disk_percent = storage_values['disk.percent']
-            storage_disk_used = self.format_bytes(storage_values['disk.used'])
-            storage_disk_avail = self.format_bytes(storage_values['disk.avail'])
-            storage_disk_total = self.format_bytes(storage_values['disk.total'])
-            table.add_row(str(key), str(storage_shards), str(storage_disk_percent), str(storage_disk_used), str(storage_disk_avail), str(storage_disk_total))
+        # format_bytes already hands back strings, only the numeric columns need converting.
+        format_bytes = self.format_bytes
+        add_row = table.add_row
+        for storage_node, storage_values in data_dict.items():
+            add_row(storage_node,
+                    str(storage_values['shards']),
+                    str(storage_values['disk.percent']),
+                    format_bytes(storage_values['disk.used']),
+                    format_bytes(storage_values['disk.avail']),
+                    format_bytes(storage_values['disk.total']))
 
         console.print(table)
 
     def print_table_shards(self, shards_info):
-        console = Console()
         table = Table(show_header=True, header_style="bold cyan")
         table.add_column("Index Name")
         table.add_column("Shard Number")
@@ -413,91 +512,58 @@ class ElasticsearchClient:
         table.add_column("Store")
         table.add_column("Node")
 
+        # Bind add_row once and look each optional field up only once per shard.
+        add_row = table.add_row
         for shard_info in shards_info:
-            table.add_row(
+            docs = shard_info["docs"]
+            store = shard_info["store"]
+            node = shard_info["node"]
+            add_row(
                 shard_info["index"],
                 shard_info["shard"],
                 shard_info["prirep"],
                 shard_info["state"],
-                shard_info["docs"] if shard_info["docs"] is not None else "N/A",
-                shard_info["store"] if shard_info["store"] is not None else "N/A",
-                shard_info["node"] if shard_info["node"] is not None else "N/A"
+                docs if docs is not None else "N/A",
+                store if store is not None else "N/A",
+                node if node is not None else "N/A"
             )
 
         console.print(table)
 
     def print_table_from_dict(self, title, data_dict):
-        console = Console()
-
         table = Table(show_header=True, title=title, header_style="bold cyan", box=self.box_style)
         table.add_column("Key")
         table.add_column("Value")
 
         for key, value in data_dict.items():
 
-            if (key == "cluster_status" and value == "green"):
-                value="[green]green[/green]"
-            if (key == "cluster_status" and value == "yellow"):
-                value="[yellow]yellow[/yellow]"
-            if (key == "cluster_status" and value == "red"):
-                value="[red]red[/red]"
-            if (key == "active_shards_percent" and value == 100.0):
-                value="[green]100.0[/green]"
-            if (key == "active_shards_percent" and value != 100.0):
-                value=f"[yellow]{value}[/yellow]"
+            # Only two keys get colored, skip the value checks for everything else.
+            if (key == "cluster_status"):
+                value = STATUS_MARKUP.get(value, value)
+            elif (key == "active_shards_percent"):
+                if (value == 100.0):
+                    value="[green]100.0[/green]"
+                else:
+                    value=f"[yellow]{value}[/yellow]"
 
             table.add_row(str(key), str(value))
 
         console.print(table)
 
     def print_table_indices(self, data_dict):
-        console = Console()
-
         table = Table(show_header=True, title='Indices', header_style="bold cyan", box=self.box_style)
-        table.add_column("Health", justify="right")
-        table.add_column("Satus", justify="right")
-        table.add_column("Indice")
-        table.add_column("UUID")
-        table.add_column("Docs", justify="right")
-        table.add_column("Pri/Rep", justify="center")
-        table.add_column("Size Primary", justify="right")
-        table.add_column("Size Total", justify="right")
+        for column_name, column_justify in INDICES_COLUMNS:
+            table.add_column(column_name, justify=column_justify)
 
         for indice in data_dict:
-
-
-            indice_health = indice['health']
-            indice_status = indice['status']
-            indice_name = indice['index']
-            indice_uuid = indice['uuid']
-            indice_docs_count = indice['docs.count']
-            indice_store_size = indice['store.size']
-            indice_primary_store_size = indice['pri.store.size']
-            indice_pri = indice['pri']
-            indice_rep = indice['rep']
-            pri_rep = f"{indice_pri}|{indice_rep}"
-            indice_size = f"{indice_primary_store_size}|{indice_store_size}"
-
-            table.add_row(str(indice_health), str(indice_status), str(indice_name), str(indice_uuid), str(indice_docs_count), str(pri_rep), str(indice_primary_store_size), str(indice_store_size))
+            pri_rep = f"{indice['pri']}|{indice['rep']}"
+            table.add_row(str(indice['health']), str(indice['status']), str(indice['index']), str(indice['uuid']), str(indice['docs.count']), pri_rep, str(indice['pri.store.size']), str(indice['store.size']))
 
         console.print(table)
 
 
     def replace_roles(self, roles):
-        role_mapping = {
-            'data_cold': 'c',
-            'data': 'd',
-            'data_frozen': 'f',
-            'data_hot': 'h',
-            'ingest': 'i',
-            'ml': 'l',
-            'master': 'm',
-            'remote_cluster_client': 'r',
-            'data_content': 's',
-            'transform': 't',
-            'data_warm': 'w'
-        }
-        return ''.join(sorted(role_mapping.get(role, role) for role in roles))
+        return ''.join(sorted(ROLE_MAPPING.get(role, role) for role in roles))
 
     def change_shard_allocation(self, option):
 
@@ -525,33 +591,21 @@ class ElasticsearchClient:
             success = True
             
         except Exception as e:
-            print(f"Error deleting transient settings: {e}")
+            print(f"Error deleting transient settings: {e}", file=sys.stderr)
             success = False
     
         return success
 
-    def show_cluster_settings(self):
-
-        settings = self.es.cluster.get_settings()
-        return (json.dumps(settings))
-
-
     def get_settings(self):
 
+        # Return the dict as-is, callers serialize it themselves (print_json / flatten_json)
         settings = self.es.cluster.get_settings()
-        return json.dumps(settings)
+        return settings
 
 
     def show_message_box(self, title, message, message_style="bold white", panel_style="white on blue"):
-        self.title = title
-        self.message_style = message_style
-        self.panel_style = panel_style
-
-        message = Text(f"{message}", style=self.message_style, justify="center")
-        panel = Panel(message, style=self.panel_style, title=self.title, border_style="bold white", width=80)
-        console.print("\n")
-        console.print(panel)
-        console.print("\n")
+        # Same panel as the module level helper, no need to keep the styling on the instance.
+        show_message_box(title, message, message_style=message_style, panel_style=panel_style)
 
 
 # ---- End of Class Library above.    
@@ -561,9 +615,25 @@ def show_message_box(title, message, message_style="bold white", panel_style="wh
 
     message = Text(f"{message}", style=message_style, justify="center")
     panel = Panel(message, style=panel_style, title=title, border_style="bold white", width=80)
-    console.print("\n")
-    console.print(panel)
-    console.print("\n")        
+    # Two blank lines above and below the panel, rendered in a single print.
+    # Empty Text lines print as bare newlines (Padding would pad them with spaces).
+    console.print(Group(Text(), Text(), panel, Text(), Text()))
+
+def print_json(data):
+    # Write JSON straight to stdout, rich's print would parse markup and wrap long lines.
+    # Both paths use compact separators and raw UTF-8 (no \u escapes), only float
+    # exponents can be spelled differently (stdlib 1.5e-07, orjson 1.5e-7).
+    # The stdlib path holds the str plus its bytes copy in memory, json.dump() would
+    # avoid that but drops to the much slower pure Python encoder.
+    if orjson is not None:
+        encoded = orjson.dumps(data, option=orjson.OPT_APPEND_NEWLINE)
+    else:
+        encoded = (json.dumps(data, ensure_ascii=False, separators=(',', ':')) + "\n").encode('utf-8')
+
+    # Write bytes so the output is UTF-8 regardless of the terminal's locale.
+    sys.stdout.flush()
+    sys.stdout.buffer.write(encoded)
+    sys.stdout.buffer.flush()
 
 def convert_dict_list_to_dict(dict_list):
     result_dict = {}
@@ -573,8 +643,8 @@ def convert_dict_list_to_dict(dict_list):
     return result_dict
 
 def read_config_server(file_path, locations):
-    with open(file_path, 'r') as file:
-        config = yaml.safe_load(file)
+    with open(file_path, 'rb') as file:
+        config = yaml.load(file.read(), Loader=YamlLoader)
         servers = config.get('servers', [])
         default_config = config.get('default', {})
         
@@ -596,8 +666,8 @@ def read_config_server(file_path, locations):
 # Read Data from YAML, store data automatically into Global Variables
 def read_servers_from_yaml(file_path):
     # Open YAML and read into array: data
-    with open(file_path, 'r') as file:
-        data = yaml.safe_load(file)
+    with open(file_path, 'rb') as file:
+        data = yaml.load(file.read(), Loader=YamlLoader)
 
     # Loop through data and return dict.
     # Convert hostname to 'lowercase' to normalize
@@ -610,10 +680,10 @@ def read_servers_from_yaml(file_path):
     return _servers
 
 def read_yaml_file(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, 'r') as file:
-            return yaml.safe_load(file)
-    else:
+    try:
+        with open(file_path, 'rb') as file:
+            return yaml.load(file.read(), Loader=YamlLoader)
+    except FileNotFoundError:
         return {}
 
 def read_settings(file):
@@ -624,14 +694,19 @@ def read_settings(file):
         settings = {"current_cluster": "default"}
     return settings
 
-def write_settings(settings):
-    with open('escmd.json', 'w') as file:
-        json.dump(settings, file, indent=4)
+def write_settings(file, settings):
+    # Write to a temp file then rename, so escmd.json is never left half written.
+    tmp_file = f"{file}.tmp"
+    with open(tmp_file, 'w') as f:
+        json.dump(settings, f, indent=4)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_file, file)
 
 def set_cluster(file, value):
     settings = read_settings(file)
     settings["current_cluster"] = value
-    write_settings(settings)
+    write_settings(file, settings)
     print(f"Current cluster set to: {value}")
 
 
@@ -700,7 +775,8 @@ if __name__ == "__main__":
 
     # Now we need to see what environment is defauled to by set-default
     state_file = f"{script_directory}/escmd.json"
-    default_cluster_from_file = read_settings(state_file)['current_cluster']
+    state_settings = read_settings(state_file)
+    default_cluster_from_file = state_settings['current_cluster']
 
     # Need to Place this here so that it bypasses a lot of the checks afterwards.
     if (args.command == 'set-default'):
@@ -709,17 +785,17 @@ if __name__ == "__main__":
         exit()
 
     if args.command == 'get-default':
-        current_cluster = read_settings(state_file)
         message = [f"name: {default_cluster_from_file}"]
-        try:
-            for key,value in servers_dict[default_cluster_from_file].items():
+        default_server = servers_dict.get(default_cluster_from_file)
+        if default_server is None:
+            show_message = "No Configuration Found"
+        else:
+            for key,value in default_server.items():
                 append_item = f"{key}: {value}"
                 message.append(append_item)
-                show_message = "\n".join(message)
-        except KeyError: 
-            show_message = "No Configuration Found"
+            show_message = "\n".join(message)
         
-        show_message_box(f"Default Cluster: {current_cluster['current_cluster']}", message=f"\n{show_message}\n")      
+        show_message_box(f"Default Cluster: {default_cluster_from_file}", message=f"\n{show_message}\n")      
         exit()
    
 
@@ -753,148 +829,120 @@ if __name__ == "__main__":
 
     # Need to Define the Box Style (have to do a bit of magic)
     box_style_string = default_settings.get('box_style', 'SQUARE_DOUBLE_HEAD')
-    # Define a dictionary mapping strings to box styles
-    box_styles = {
-        "SIMPLE": box.SIMPLE,
-        "ASCII": box.ASCII,
-        "SQUARE": box.SQUARE,
-        "ROUNDED": box.ROUNDED,
-        "SQUARE_DOUBLE_HEAD": box.SQUARE_DOUBLE_HEAD
-    }
-    box_style = box_styles.get(box_style_string)
+    box_style = BOX_STYLES.get(box_style_string)
 
 
     #### Now to process arguments and do the work.
 
     # If no arguments passed, display help.
-    if vars(args)['command'] == None:
+    if args.command is None:
         parser.print_help()
     else:
 
+        # Commands that only display a message don't need to connect (and ping) ES.
+        offline_command = args.command == 'version' or (args.command == 'allocation' and args.allocation_cmd in ('display', 'show'))
+
         # We want to ensure it doesn't try to connect to ES for the set-default command.
-        if (args.command != 'set-default'):
+        if (args.command != 'set-default' and not offline_command):
 
             # Setup Elastic Search Connection
             es_client = ElasticsearchClient(host=elastic_host, port=elastic_port, use_ssl=elastic_use_ssl, verify_certs=elastic_verify_certs, elastic_authentication=elastic_authentication, elastic_username=elastic_username, elastic_password=elastic_password, box_style=box_style)
 
         if args.command == 'ping':
-            # Setup Elastic Search Connection
-            if es_client.ping():
-                if (es_client.elastic_username != None and es_client.elastic_password != None):
-                    cluster_connection_info = f"Cluster: {locations}\nhost: {elastic_host}\nport: {elastic_port}\nssl: {elastic_use_ssl}\nverify_certs: {elastic_verify_certs}\nelastic_username: {elastic_username}\nelastic_password: XXXXXXXXXXX\n"
-                else:
-                    cluster_connection_info = f"Cluster: {locations}\nhost: {elastic_host}\nport: {elastic_port}\nssl: {elastic_use_ssl}\nverify_certs: {elastic_verify_certs}\n"
-                es_client.show_message_box("Connection Success", f"\n{cluster_connection_info}\nConnection was successful.\n", message_style="bold white")
-                exit()
+            # ElasticsearchClient() already pinged the cluster (and exits on failure), so no need to ping again.
+            connection_info = (f"Cluster: {locations}", f"host: {elastic_host}", f"port: {elastic_port}", f"ssl: {elastic_use_ssl}", f"verify_certs: {elastic_verify_certs}")
+            if (es_client.elastic_username != None and es_client.elastic_password != None):
+                connection_info += (f"elastic_username: {elastic_username}", "elastic_password: XXXXXXXXXXX")
+            cluster_connection_info = "\n".join(connection_info) + "\n"
+            es_client.show_message_box("Connection Success", f"\n{cluster_connection_info}\nConnection was successful.\n", message_style="bold white")
+            exit()
 
 
-        if (args.command == 'allocation'):
+        elif (args.command == 'allocation'):
             if (args.allocation_cmd == "display" or args.allocation_cmd == "show"):
-                es_client.show_message_box("ES Allocation Info",f"Please pass additional keyword: disable, enable", message_style='bold white', panel_style='bold white')
+                show_message_box("ES Allocation Info",f"Please pass additional keyword: disable, enable", message_style='bold white', panel_style='bold white')
                 exit()
 
-            elif (args.allocation_cmd == "disable"):
-                success = es_client.change_shard_allocation('primary')
+            else:
+                allocation_option, success_message = ALLOCATION_CHANGES[args.allocation_cmd]
+                success = es_client.change_shard_allocation(allocation_option)
                 if success == True:
-                    print("Successfully changed allocation to primaries only.")
-                    es_client.show_cluster_settings()
-
+                    print(success_message)
                 else:
                     print("An ERROR occurred trying to change allocation")
                     exit(1)
-            elif (args.allocation_cmd == "enable"):
-                success = es_client.change_shard_allocation('all')
-                if success == True:
-                    print("Successfully re-enabled all shards allocation.")
-                    es_client.show_cluster_settings()
-                else:
-                    print("An ERROR occurred trying to change allocation")
-                    exit(1)            
-    
 
-        if (args.command == 'current-master'):
+
+        elif (args.command == 'current-master'):
             
             master_node_id = es_client.get_master_node()
             
             if args.format=='json':
-                print(json.dumps(master_node_id))
+                print_json(master_node_id)
             else:
                 print(f"Current Master is: [cyan]{master_node_id}[/cyan]")
 
-        if (args.command == 'flush'):
-            flushsync = es_client.flush_synced_elasticsearch(elastic_host, elastic_port, elastic_use_ssl, elastic_username, elastic_password)
+        elif (args.command == 'flush'):
+            flushsync = es_client.flush_synced_elasticsearch()
             message = flushsync['_shards']
             es_client.show_message_box("ElasticSearch Flush", f"POST completed to _flush/synced\n{message}")
             exit()
 
-        if (args.command == 'nodes'):
-            nodes = es_client.get_nodes()
+        elif (args.command == 'nodes'):
 
             if args.format=='json':
-                json_dump = json.dumps(nodes)
-                print(json_dump)
-            elif args.format=='data':
-                data_nodes = es_client.filter_nodes_by_role(nodes,'data')
-                keys, values = es_client.obtain_keys_values(data_nodes)
-                display_keys = ["name", "hostname", "node", "roles"]
-                es_client.print_filtered_key_value_pairs(keys,values, display_keys)            
+                print_json(es_client.get_nodes())
             else:
+                # Tables also mark the current master, so fetch both at the same time.
+                nodes, master_node = es_client.get_nodes_and_master()
+                if args.format=='data':
+                    nodes = es_client.filter_data_nodes(nodes)
                 keys, values = es_client.obtain_keys_values(nodes)
-                display_keys = ["name", "hostname", "node", "roles"]
-                es_client.print_filtered_key_value_pairs(keys,values, display_keys)
+                es_client.print_filtered_key_value_pairs(keys,values, NODE_DISPLAY_KEYS, current_master=master_node)
 
-        if (args.command == 'masters'):
-            nodes = es_client.get_nodes()
-            master_node_id = es_client.get_master_node()
-            master_nodes = es_client.filter_nodes_by_role(nodes, 'master')
+        elif (args.command == 'masters'):
             if args.format=='json':
-                print(json.dumps(master_nodes))
+                nodes = es_client.get_nodes()
+                print_json(es_client.filter_nodes_by_role(nodes, 'master'))
             else:
+                nodes, master_node = es_client.get_nodes_and_master()
                 master_nodes = es_client.filter_nodes_by_role(nodes, 'master')
                 keys, values = es_client.obtain_keys_values(master_nodes)
-                display_keys = ["name", "hostname", "node", "roles"]
-                es_client.print_filtered_key_value_pairs(keys,values, display_keys)            
+                es_client.print_filtered_key_value_pairs(keys,values, NODE_DISPLAY_KEYS, current_master=master_node)
 
-        if (args.command == 'health'):
+        elif (args.command == 'health'):
             health_data = es_client.get_cluster_health()
             if args.format=='json':
-                json_dump = json.dumps(health_data)
-                print(json_dump)
+                print_json(health_data)
             else:
                 print("")
                 es_client.print_table_from_dict('Elastic Health Status', health_data)
 
-        if (args.command == 'indices'):
+        elif (args.command == 'indices'):
 
-            if (args.regex != None):
-                if (args.format=='json'):
-                    print(es_client.get_indices_stats(pattern=args.regex))
-                    exit()
-                else:
-                    es_client.list_indices_stats(pattern=args.regex)
-                    exit()
+            # pattern=None lists all indices
             if args.format=='json':
-                print(es_client.get_indices_stats(pattern=args.regex))
+                print_json(es_client.get_indices_stats(pattern=args.regex))
             else:
-                es_client.list_indices_stats(None)
+                es_client.list_indices_stats(pattern=args.regex)
 
-        if (args.command == 'recovery'):
+        elif (args.command == 'recovery'):
             if (args.format == "json"):
                 es_recovery = es_client.get_recovery_status()
-                print(json.dumps(es_recovery))
+                print_json(es_recovery)
                 exit()
 
             else:
 
-                with console.status("Retrieving recovery data..."):
+                with console.status("Retrieving recovery data...", refresh_per_second=4):
                     # Show ES Recovery Status
                     es_recovery = es_client.get_recovery_status()
                     es_client.display_recovery_table(es_recovery)
                 exit()
 
-        if (args.command == 'settings'):
+        elif (args.command == 'settings'):
             if (args.format == 'json'):
-                print(es_client.show_cluster_settings())
+                print_json(es_client.get_settings())
                 exit()
             else:
                 cluster_settings = es_client.get_settings()
@@ -905,15 +953,15 @@ if __name__ == "__main__":
                     es_client.print_table_from_dict("Cluster Settings", cluster_flattened)
                 exit()
 
-        if (args.command == 'storage'):
+        elif (args.command == 'storage'):
             allocation_data = es_client.get_allocation_as_dict()
             es_client.print_table_allocation("Cluster Allocation", allocation_data)
 
-        if (args.command == 'shards'):
+        elif (args.command == 'shards'):
 
             if (args.regex != None):
                 if (args.format=='json'):
-                    print(json.dumps(es_client.get_shards_stats(pattern=args.regex)))
+                    print_json(es_client.get_shards_stats(pattern=args.regex))
                     exit()
                 else:
                     shards_data = es_client.get_shards_stats(pattern=args.regex)
@@ -924,11 +972,11 @@ if __name__ == "__main__":
                 shards_data_dict = es_client.get_shards_as_dict()
                 
                 if (args.format == 'json'):
-                    print(json.dumps(shards_data_dict))
+                    print_json(shards_data_dict)
                 else:
                     es_client.print_table_shards(shards_data_dict)
 
-        if (args.command == 'version'):
-                es_client.show_message_box("Version Info",f"Utility: escmd.py\nVersion: {VERSION} ({DATE})", message_style='bold white', panel_style='bold white')
+        elif (args.command == 'version'):
+                show_message_box("Version Info",f"Utility: escmd.py\nVersion: {VERSION} ({DATE})", message_style='bold white', panel_style='bold white')
                 exit()
         
\ No newline at end of file
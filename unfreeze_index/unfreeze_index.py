@@ -24,7 +24,6 @@ from rich.text import Text
 from rich import box
 from rich.box import Box
 import pickle
-import time
 
 
 def Merge(dict1, dict2):
@@ -311,9 +310,8 @@ Function to update the status bar with latest data.
 def status_bar_update(message):
     global console
 
-    with console.status(f"[bold green]{message}") as status:
-        time.sleep(0.5)
-        console.log(message)
+    # Just log it, no need to hold a spinner on screen for an artificial delay.
+    console.log(message)
 
 
 def show_message_box(title, message, message_style="bold white", panel_style="white on blue"):
@@ -360,7 +358,6 @@ if __name__ == "__main__":
     status_bar_update(f"Query: DATE: [{dt}], COMPONENT: [bold green]{comp}[/bold green], LOCATIONS {locations}")
     batched_final = defaultdict(dict)
 
-    time.sleep(1)
     with console.status("Collecting data...") as status:
 
         for location in locations:
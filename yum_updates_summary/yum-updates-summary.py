@@ -62,7 +62,8 @@ def get_package_info_with_highest_available_version(package_name):
         "available": []
     }
     status = None
-    available_versions = []
+    highest_available_version = None
+    highest_available_key = None
 
     for line in lines:
         if "Installed Packages" in line:
@@ -77,11 +78,11 @@ def get_package_info_with_highest_available_version(package_name):
                 repository = parts[2].strip()
                 if package_name != status.capitalize():
                     if status == "available":
-                        available_versions.append({
-                            "package_name": package_name,
-                            "version": version,
-                            "repository": repository
-                        })
+                        # Track the highest available version as we go, rather than collecting them all to max() later
+                        version_key = parse_version(version)
+                        if highest_available_version is None or version_key > highest_available_key:
+                            highest_available_version = version
+                            highest_available_key = version_key
                     else:
                         package_data[status].append({
                             "package_name": package_name,
@@ -90,12 +91,7 @@ def get_package_info_with_highest_available_version(package_name):
                         })
 
 
-    # Find the highest available version
-    if available_versions:
-        highest_available_version = max(available_versions, key=lambda x: parse_version(x['version']))
-        package_data["highest_available_version"] = highest_available_version["version"]
-    else:
-        package_data["highest_available_version"] = None
+    package_data["highest_available_version"] = highest_available_version
 
     #print(package_name, package_data)
 